@@ -10,6 +10,7 @@ from ai_provider import ai_provider
 from utils import (
     format_structured_data, 
     format_assessment_for_selection,
+    index_candidates,
     validate_ai_selection,
     find_matching_candidate
 )
@@ -278,6 +279,9 @@ class VectorDiagnosisMatcher:
             
             max_retries = 3
             
+            # Candidate names are normalized on first use and reused by later attempts
+            candidate_index = None
+            
             for attempt in range(max_retries):
                 logger.info(f"AI diagnosis selection attempt {attempt + 1}/{max_retries}")
 
@@ -307,10 +311,15 @@ class VectorDiagnosisMatcher:
                         json_part = cleaned_response[start_brace:end_brace+1]
                         ai_response = json.loads(json_part)
                         
+                        # Built inside the attempt so a malformed candidate is handled
+                        # like any other attempt error (logged, retried, then fallback)
+                        if candidate_index is None:
+                            candidate_index = index_candidates(candidates)
+                        
                         # Validate that AI selected from candidate list
-                        if validate_ai_selection(ai_response, candidates):
+                        if validate_ai_selection(ai_response, candidate_index):
                             # Find and return the matching candidate with AI reasoning
-                            result = find_matching_candidate(ai_response, candidates)
+                            result = find_matching_candidate(ai_response, candidate_index)
                             if result:
                                 logger.info(f"AI selected valid diagnosis: {result.get('diagnosis')}")
                                 return result
@@ -219,7 +219,7 @@ async def generate_ncp(request: Request, assessment_data: Dict) -> Dict:
     """
     try:
         # Log the incoming request structure
-        logger.info(f"Received assessment data for NCP generation: {assessment_data}")
+        logger.debug("Received assessment data for NCP generation: %s", assessment_data)
 
         # Validate incoming data - handle validation errors specifically
         try:
@@ -831,7 +831,7 @@ async def generate_explanation(request: Request, request_data: Dict) -> Dict:
             }
         
         logger.info(f"Successfully parsed explanations for sections: {list(explanations.keys())}")
-        logger.info(f"Explanations: {explanations}")
+        logger.debug("Explanations: %s", explanations)
         return explanations
 
     except Exception as e:
@@ -1013,7 +1013,7 @@ async def suggest_diagnoses(request: Request, assessment_data: Dict) -> Dict:
             )
         
         logger.info(f"Using keywords for diagnosis matching: {embedding_keywords}")
-        logger.info(f"Original assessment: {original_assessment}")
+        logger.debug("Original assessment: %s", original_assessment)
         
         # ----------------------------------------------------------------
         # STEP 3: VECTOR SIMILARITY SEARCH
@@ -1,301 +1,342 @@
+import io
 import re
-from typing import Dict, List
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Iterable, List
 import logging
 
 logger = logging.getLogger(__name__)
 
-def validate_assessment_data(data: Dict):
+# Top-level keys every legacy structured assessment must include
+_LEGACY_REQUIRED_KEYS = ('demographics', 'chief_complaint', 'history', 'medical_history',
+                         'vital_signs', 'physical_exam', 'risk_factors', 'nurse_notes')
+_LEGACY_REQUIRED_KEY_SET = frozenset(_LEGACY_REQUIRED_KEYS)
+
+# Legacy input mode keyed by (required fields present out of sex and chief
+# complaint, whether any clinical data category is filled in):
+# - all required fields present: Assistant Mode
+# - no required fields but clinical data: Pure Manual Mode
+# - some required fields and clinical data: Partial Manual Mode
+# - otherwise there is nothing meaningful to work with
+_ASSESSMENT_MODES = {
+    (2, True): "assistant",
+    (2, False): "assistant",
+    (1, True): "partial_manual",
+    (1, False): "invalid",
+    (0, True): "pure_manual",
+    (0, False): "invalid"
+}
+
+# Comprehensive form fields that each count as one category of clinical data
+_COMPREHENSIVE_CLINICAL_KEYS = (
+    'occupation', 'general_condition', 'onset_duration', 'severity_progression',
+    'medical_impression', 'associated_symptoms', 'other_symptoms', 'risk_factors',
+    'other_risk_factors', 'medical_history', 'other_medical_history', 'family_history',
+    'other_family_history', 'heart_rate_bpm', 'blood_pressure_mmhg', 'respiratory_rate_min',
+    'oxygen_saturation_percent', 'temperature_celsius', 'pain_scale', 'height', 'weight',
+    'cephalocaudal_assessment', 'laboratory_results', 'subjective', 'objective'
+)
+
+# Matches an NCP section header such as "**Assessment:**" at the start of a
+# stripped line; any text after the header on that line is not section content
+_SECTION_HEADER_PATTERN = re.compile(r'\*\*(.*?):\*\*', re.IGNORECASE)
+
+# NCP sections returned by parse_ncp_response, with the placeholder used for
+# sections the AI response leaves empty or marks as not applicable
+_NCP_SECTION_KEYS = ("assessment", "diagnosis", "outcomes", "interventions", "rationale", "implementation", "evaluation")
+_NCP_SECTION_KEY_SET = frozenset(_NCP_SECTION_KEYS)
+_EMPTY_NCP_SECTIONS = dict.fromkeys(_NCP_SECTION_KEYS, "Not provided")
+_NOT_PROVIDED_CONTENT = ('not applicable', 'n/a')
+
+# Header keywords mapped to the NCP section they start; the first keyword
+# found in a header wins
+_SECTION_KEYWORDS = (
+    ("diagnosis", "diagnosis"),
+    ("assessment", "assessment"),
+    ("outcome", "outcomes"),
+    ("goal", "outcomes"),
+    ("intervention", "interventions"),
+    ("rationale", "rationale"),
+    ("implementation", "implementation"),
+    ("evaluation", "evaluation")
+)
+
+# Matches an explanation section header line such as "**Assessment:**" and
+# captures the section name between the markup
+_EXPLANATION_HEADER_PATTERN = re.compile(r'\*\*(.*):\*\*')
+
+# Deletes any "*" and ":" markup left inside explanation section names in one pass
+_HEADER_MARKUP_TABLE = str.maketrans('', '', '*:')
+
+# Explanation type headers recognized by parse_explanation_text, e.g.
+# "Clinical Reasoning Summary:"; the two groups name the explanation category
+# and the field ("summary" or "detailed") the following text fills in
+_EXPLANATION_TYPE_PATTERN = re.compile(
+    r'(clinical reasoning|evidence-based support|student guidance)\s+(summary|detailed)', re.IGNORECASE
+)
+_EXPLANATION_CATEGORIES = {
+    'clinical reasoning': 'clinical_reasoning',
+    'evidence-based support': 'evidence_based_support',
+    'student guidance': 'student_guidance'
+}
+
+def _is_nonblank(text: str) -> bool:
+    """Check that a string has a non-whitespace character without building a stripped copy."""
+    return bool(text) and not text.isspace()
+
+def has_meaningful_value(value: object) -> bool:
+    """Check if a value is meaningful (not None, empty string, or empty array)"""
+    if value is None:
+        return False
+    if isinstance(value, str):
+        return _is_nonblank(value)
+    if isinstance(value, list):
+        return any(_is_nonblank(item) if isinstance(item, str) else item for item in value)
+    if isinstance(value, (int, float)):
+        return True
+    return bool(value)
+
+def validate_assessment_data(data: Dict) -> bool:
     """Validate the incoming assessment data (enhanced version)."""
-    
     # Check if this is the legacy structured format first
     if 'demographics' in data and 'chief_complaint' in data:
-        # Legacy structured format validation
-        required_keys = ['demographics', 'chief_complaint', 'history', 'medical_history', 
-                        'vital_signs', 'physical_exam', 'risk_factors', 'nurse_notes']
-        
-        if not all(key in data for key in required_keys):
-            raise ValueError(f"Missing required keys in structured data. Expected: {required_keys}")
-        
-        # Check demographics and chief complaint
-        demographics = data.get('demographics', {})
-        chief_complaint = data.get('chief_complaint', '').strip()
-        age = demographics.get('age')
-        sex = demographics.get('sex', '').strip()
-        
-        # Count how many required fields are present
-        required_fields_present = sum([
-            bool(sex),
-            bool(chief_complaint)
-        ])
-        
-        # comprehensive check for clinical data
-        def has_meaningful_value(value):
-            """Check if a value is meaningful (not None, empty string, or empty array)"""
-            if value is None:
-                return False
-            if isinstance(value, str):
-                return len(value.strip()) > 0
-            if isinstance(value, list):
-                return len(value) > 0 and any(item.strip() if isinstance(item, str) else item for item in value)
-            if isinstance(value, (int, float)):
-                return True
-            return bool(value)
-        
-        # Check each category of clinical data
-        has_occupation = has_meaningful_value(demographics.get('occupation'))
-        
-        # Check history - any field with meaningful data
-        history = data.get('history', {})
-        has_history = any(has_meaningful_value(v) for v in history.values())
-        
-        # Check medical history
-        has_med_history = (
-            has_meaningful_value(data.get('medical_history')) or 
-            has_meaningful_value(data.get('medical_history_other'))
-        )
-        
-        # Check vital signs - any field with meaningful data
-        vitals = data.get('vital_signs', {})
-        has_vitals = any(has_meaningful_value(v) for v in vitals.values())
-        
-        # Check physical exam
-        has_physical_exam = (
-            has_meaningful_value(data.get('physical_exam')) or 
-            has_meaningful_value(data.get('physical_exam_other'))
-        )
-        
-        # Check risk factors
-        has_risk_factors = (
-            has_meaningful_value(data.get('risk_factors')) or 
-            has_meaningful_value(data.get('risk_factors_other'))
-        )
-        
-        # Check nurse notes
-        has_nurse_notes = has_meaningful_value(data.get('nurse_notes'))
-        
-        # Count total clinical data categories
-        clinical_data_categories = [
-            has_occupation,
-            has_history,
-            has_med_history,
-            has_vitals,
-            has_physical_exam,
-            has_risk_factors,
-            has_nurse_notes
-        ]
-        
-        clinical_data_count = sum(clinical_data_categories)
-        has_clinical_data = clinical_data_count > 0
-        
-        # Determine the mode based on completeness and data richness
-        if required_fields_present == 2:  
-            # All required fields present - likely Assistant Mode
-            mode = "assistant"
-        elif required_fields_present == 0 and has_clinical_data:
-            # No required fields but has clinical data - likely Pure Manual Mode
-            mode = "pure_manual"
-        elif required_fields_present > 0 and has_clinical_data:
-            # Some required fields present - likely Partial Manual Mode
-            mode = "partial_manual"
-        else:
-            # No required fields and no clinical data - Invalid
-            mode = "invalid"
-        
-        # Apply validation based on detected mode
-        if mode == "pure_manual":
-            # For pure manual mode, require at least 2 different types of clinical data
-            if clinical_data_count < 2:
-                raise ValueError("Unable to extract sufficient clinical information from the provided assessment data. Please ensure your manual input includes clear details about patient symptoms, vital signs, physical findings, medical history, or other relevant clinical information.")
-            
-            logger.info("Pure manual mode assessment detected - proceeding with available clinical data")
-            
-        elif mode == "partial_manual":
-            # For partial manual mode, be more lenient - require at least ONE key clinical component
-            has_key_clinical_component = (
-                chief_complaint or  # Has chief complaint
-                has_history or  # Has history
-                has_vitals or  # Has vital signs
-                has_physical_exam or  # Has physical exam
-                has_nurse_notes  # Has nurse notes
-            )
-            
-            if not has_key_clinical_component:
-                raise ValueError("Insufficient clinical information found. Please provide at least a chief complaint, patient history, vital signs, physical examination findings, or detailed nurse notes.")
-            
-            logger.info(f"Partial manual mode assessment detected ({required_fields_present}/2 required fields) - proceeding with available clinical data") 
-            
-        elif mode == "assistant":
-            # For assistant mode, enforce required fields but age is optional
-            if not sex:
-                raise ValueError("Patient sex is required. Please provide the patient's sex or switch to Manual Mode if this information is not available.")
-            
-            if not chief_complaint:
-                raise ValueError("Chief complaint is required. Please provide the main reason for the patient's visit or switch to Manual Mode for free-text input.")
-            
-            # For assistant mode, require at least 1 additional clinical data category
-            if clinical_data_count < 1:
-                raise ValueError("Please provide additional clinical information beyond the required fields. Include at least some history, vital signs, physical exam findings, or other relevant clinical data to generate a meaningful care plan.")
-            
-            logger.info(f"Assistant mode assessment detected - required fields present with {clinical_data_count} additional clinical data categories")
-            
-        else:  # mode == "invalid"
-            raise ValueError("No meaningful clinical information found. Please provide patient assessment data including symptoms, vital signs, physical findings, or other relevant clinical information.")
-        
-        logger.info("Structured assessment data validation passed")
-        return True
+        return _validate_legacy_assessment(data)
     
     # Default to comprehensive form validation for any non-legacy format
-    logger.info("Detected comprehensive manual form format")
-    
-    # Check for meaningful clinical data
-    def has_meaningful_value(value):
-        """Check if a value is meaningful (not None, empty string, or empty array)"""
-        if value is None:
-            return False
-        if isinstance(value, str):
-            return len(value.strip()) > 0
-        if isinstance(value, list):
-            return len(value) > 0 and any(item.strip() if isinstance(item, str) else item for item in value)
-        if isinstance(value, (int, float)):
-            return True
-        return bool(value)
-    
-    # Count clinical data categories
+    return _validate_comprehensive_assessment(data)
+
+def _validate_legacy_assessment(data: Dict) -> bool:
+    """Validate a legacy structured assessment according to its detected input mode."""
+    if not data.keys() >= _LEGACY_REQUIRED_KEY_SET:
+        raise ValueError(f"Missing required keys in structured data. Expected: {list(_LEGACY_REQUIRED_KEYS)}")
+    
+    # Check demographics and chief complaint
+    demographics = data.get('demographics', {})
+    chief_complaint = data.get('chief_complaint', '').strip()
+    age = demographics.get('age')
+    sex = demographics.get('sex', '').strip()
+    
+    # Count how many required fields are present
+    required_fields_present = sum([
+        bool(sex),
+        bool(chief_complaint)
+    ])
+    
+    # Check each category of clinical data
+    has_occupation = has_meaningful_value(demographics.get('occupation'))
+    
+    # Check history - any field with meaningful data
+    history = data.get('history', {})
+    has_history = any(has_meaningful_value(v) for v in history.values())
+    
+    # Check medical history
+    has_med_history = (
+        has_meaningful_value(data.get('medical_history')) or 
+        has_meaningful_value(data.get('medical_history_other'))
+    )
+    
+    # Check vital signs - any field with meaningful data
+    vitals = data.get('vital_signs', {})
+    has_vitals = any(has_meaningful_value(v) for v in vitals.values())
+    
+    # Check physical exam
+    has_physical_exam = (
+        has_meaningful_value(data.get('physical_exam')) or 
+        has_meaningful_value(data.get('physical_exam_other'))
+    )
+    
+    # Check risk factors
+    has_risk_factors = (
+        has_meaningful_value(data.get('risk_factors')) or 
+        has_meaningful_value(data.get('risk_factors_other'))
+    )
+    
+    # Check nurse notes
+    has_nurse_notes = has_meaningful_value(data.get('nurse_notes'))
+    
+    # Count total clinical data categories
     clinical_data_categories = [
-        has_meaningful_value(data.get('occupation')),
-        has_meaningful_value(data.get('general_condition')),
-        has_meaningful_value(data.get('onset_duration')),
-        has_meaningful_value(data.get('severity_progression')),
-        has_meaningful_value(data.get('medical_impression')),
-        has_meaningful_value(data.get('associated_symptoms')),
-        has_meaningful_value(data.get('other_symptoms')),
-        has_meaningful_value(data.get('risk_factors')),
-        has_meaningful_value(data.get('other_risk_factors')),
-        has_meaningful_value(data.get('medical_history')),
-        has_meaningful_value(data.get('other_medical_history')),
-        has_meaningful_value(data.get('family_history')),
-        has_meaningful_value(data.get('other_family_history')),
-        has_meaningful_value(data.get('heart_rate_bpm')),
-        has_meaningful_value(data.get('blood_pressure_mmhg')),
-        has_meaningful_value(data.get('respiratory_rate_min')),
-        has_meaningful_value(data.get('oxygen_saturation_percent')),
-        has_meaningful_value(data.get('temperature_celsius')),
-        has_meaningful_value(data.get('pain_scale')),
-        has_meaningful_value(data.get('height')),
-        has_meaningful_value(data.get('weight')),
-        has_meaningful_value(data.get('cephalocaudal_assessment')),
-        has_meaningful_value(data.get('laboratory_results')),
-        has_meaningful_value(data.get('subjective')),
-        has_meaningful_value(data.get('objective')),
+        has_occupation,
+        has_history,
+        has_med_history,
+        has_vitals,
+        has_physical_exam,
+        has_risk_factors,
+        has_nurse_notes
     ]
     
     clinical_data_count = sum(clinical_data_categories)
+    has_clinical_data = clinical_data_count > 0
+    
+    # Determine the mode based on completeness and data richness
+    mode = _ASSESSMENT_MODES[required_fields_present, has_clinical_data]
+    
+    # Apply validation based on detected mode
+    if mode == "pure_manual":
+        # For pure manual mode, require at least 2 different types of clinical data
+        if clinical_data_count < 2:
+            raise ValueError("Unable to extract sufficient clinical information from the provided assessment data. Please ensure your manual input includes clear details about patient symptoms, vital signs, physical findings, medical history, or other relevant clinical information.")
+    
+        logger.info("Pure manual mode assessment detected - proceeding with available clinical data")
+    
+    elif mode == "partial_manual":
+        # For partial manual mode, be more lenient - require at least ONE key clinical component
+        has_key_clinical_component = (
+            chief_complaint or  # Has chief complaint
+            has_history or  # Has history
+            has_vitals or  # Has vital signs
+            has_physical_exam or  # Has physical exam
+            has_nurse_notes  # Has nurse notes
+        )
+    
+        if not has_key_clinical_component:
+            raise ValueError("Insufficient clinical information found. Please provide at least a chief complaint, patient history, vital signs, physical examination findings, or detailed nurse notes.")
+    
+        logger.info("Partial manual mode assessment detected (%d/2 required fields) - proceeding with available clinical data", required_fields_present)
     
-    # Flexible validation - require at least some clinical data
-    if clinical_data_count < 1:
+    elif mode == "assistant":
+        # For assistant mode, enforce required fields but age is optional
+        if not sex:
+            raise ValueError("Patient sex is required. Please provide the patient's sex or switch to Manual Mode if this information is not available.")
+    
+        if not chief_complaint:
+            raise ValueError("Chief complaint is required. Please provide the main reason for the patient's visit or switch to Manual Mode for free-text input.")
+    
+        # For assistant mode, require at least 1 additional clinical data category
+        if clinical_data_count < 1:
+            raise ValueError("Please provide additional clinical information beyond the required fields. Include at least some history, vital signs, physical exam findings, or other relevant clinical data to generate a meaningful care plan.")
+    
+        logger.info("Assistant mode assessment detected - required fields present with %d additional clinical data categories", clinical_data_count)
+    
+    else:  # mode == "invalid"
+        raise ValueError("No meaningful clinical information found. Please provide patient assessment data including symptoms, vital signs, physical findings, or other relevant clinical information.")
+    
+    logger.info("Structured assessment data validation passed")
+    return True
+
+def _validate_comprehensive_assessment(data: Dict) -> bool:
+    """Validate a comprehensive manual form assessment (flat structure)."""
+    logger.info("Detected comprehensive manual form format")
+    
+    # Flexible validation - require at least some clinical data; stop at the
+    # first meaningful category since one is all that's needed
+    if not any(has_meaningful_value(data.get(key)) for key in _COMPREHENSIVE_CLINICAL_KEYS):
         raise ValueError("Please provide some clinical information to generate a meaningful nursing care plan.")
     
-    logger.info(f"Comprehensive form validation passed with {clinical_data_count} clinical data categories")
+    logger.info("Comprehensive form validation passed with at least 1 clinical data category")
     return True
 
+def _store_ncp_section(sections: Dict, section: str, section_content: List[str]):
+    """Store the collected lines of a recognized section, if it has any."""
+    if section and section_content:
+        # Lines are already stripped and non-blank, so the joined text is too
+        content = '\n'.join(section_content)
+        sections[section] = "Not provided" if content.lower() in _NOT_PROVIDED_CONTENT else content
+
 def parse_ncp_response(text: str) -> Dict:
     """
     Parse the AI response into structured sections with better formatting.
     Returns clean text with preserved structure for frontend formatting.
     """
-    sections = {
-        "assessment": "",
-        "diagnosis": "", 
-        "outcomes": "",
-        "interventions": "",
-        "rationale": "",
-        "implementation": "",
-        "evaluation": ""
-    }
-    
-    # Define regex pattern to match section headers
-    section_pattern = re.compile(r'\*\*(.*?):\*\*', re.IGNORECASE)
+    # Every section starts as "Not provided" until content is found for it
+    sections = _EMPTY_NCP_SECTIONS.copy()
     current_section = None
     section_content = []
 
-    # Iterate through each line of the text
+    # Iterate through each line of the text. splitlines() also breaks at \r,
+    # \x0b, \u2028 and other Unicode line boundaries, so this can't stream
+    # through io.StringIO, which only breaks at \n
     for line in text.splitlines():
         line = line.strip()
         
         # Check if this is a section header
-        match = section_pattern.match(line)
-        if match:
+        if match := _SECTION_HEADER_PATTERN.match(line):
             # Save previous section content if exists
-            if current_section and section_content:
-                # Join content and clean it up
-                content = '\n'.join(section_content).strip()
-                sections[current_section] = content
+            _store_ncp_section(sections, current_section, section_content)
             
-            # Start new section
+            # Start new section; content under unrecognized headers is dropped
             section_name = match.group(1).lower()
-            if "diagnosis" in section_name:
-                current_section = "diagnosis"
-            elif "assessment" in section_name:
-                current_section = "assessment"
-            elif "outcome" in section_name or "goal" in section_name:
-                current_section = "outcomes"
-            elif "intervention" in section_name:
-                current_section = "interventions"
-            elif "rationale" in section_name:
-                current_section = "rationale"
-            elif "implementation" in section_name:
-                current_section = "implementation"
-            elif "evaluation" in section_name:
-                current_section = "evaluation"
-            else:
-                current_section = None
-            
+            current_section = None
+            for keyword, section in _SECTION_KEYWORDS:
+                if keyword in section_name:
+                    current_section = section
+                    break
             section_content = []
             
         elif current_section and line:
             section_content.append(line)
     
     # Don't forget the last section
-    if current_section and section_content:
-        content = '\n'.join(section_content).strip()
-        sections[current_section] = content
-    
-    # Ensure all sections have content (use fallback if empty)
-    for section, content in sections.items():
-        if not content or content.lower() in ['not applicable', 'n/a', '']:
-            sections[section] = "Not provided"
+    _store_ncp_section(sections, current_section, section_content)
     
     return sections
 
+def _save_explanation_type(current_content: Dict, current_type: tuple, content: str):
+    """Store content under the (category, field) of the current type header."""
+    category, field = current_type
+    current_content[category][field] = content
+
+@lru_cache(maxsize=64)
+def _fallback_explanation(section: str) -> MappingProxyType:
+    """Build the generic explanation for a section the AI response did not cover."""
+    section_label = section.replace("_", " ")
+    return MappingProxyType({
+        'clinical_reasoning': MappingProxyType({
+            'summary': f'Clinical reasoning for this {section_label} component involves systematic analysis of patient data and evidence-based decision making.',
+            'detailed': f'The {section_label} component requires comprehensive clinical thinking, incorporating patient assessment data, nursing knowledge, and evidence-based guidelines to ensure safe and effective care delivery.'
+        }),
+        'evidence_based_support': MappingProxyType({
+            'summary': f'Evidence-based nursing practice supports comprehensive {section_label} documentation according to current standards.',
+            'detailed': f'Current nursing literature and professional guidelines emphasize the importance of thorough {section_label} documentation for quality patient outcomes and professional accountability.'
+        }),
+        'student_guidance': MappingProxyType({
+            'summary': f'Students should understand the purpose and components of effective {section_label}.',
+            'detailed': f'Learning objectives include theoretical foundation, practical application, and competency demonstration in {section_label}. Students should engage in guided practice and reflective learning.'
+        })
+    })
+
+@lru_cache(maxsize=32)
+def _normalized_section_names(available_sections: tuple) -> MappingProxyType:
+    """Map header-style section names ("nursing diagnosis") to section keys."""
+    return MappingProxyType({section.replace('_', ' ').lower(): section for section in available_sections})
+
 def parse_explanation_text(text: str, available_sections: list) -> Dict:
     """
     Parse plain text AI response into structured explanation format.
     """
     explanations = {}
     
-    # Split text into sections
-    lines = text.split('\n')
     current_section = None
     current_content = {}
     current_type = None
     current_text = []
     
-    for line in lines:
+    # Normalized section names are shared by every call with the same sections
+    section_names = _normalized_section_names(tuple(available_sections))
+    
+    # Stream lines one at a time instead of splitting the whole text up front
+    for line in io.StringIO(text):
         line = line.strip()
+        if not line:
+            continue
         
         # Check if this is a section header
-        if line.startswith('**') and line.endswith(':**'):
+        if header_match := _EXPLANATION_HEADER_PATTERN.fullmatch(line):
             # Save previous section if exists
             if current_section and current_content:
                 explanations[current_section] = current_content
             
             # Start new section
-            section_name = line.replace('**', '').replace(':', '').strip().lower()
-            # Map section names back to our format
-            for available_section in available_sections:
-                if available_section.replace('_', ' ').lower() in section_name:
-                    current_section = available_section
-                    break
+            section_name = header_match.group(1).translate(_HEADER_MARKUP_TABLE).strip().lower()
+            # Map section names back to our format: an exact name is a single
+            # lookup, otherwise look for a section name inside the header
+            if section_name in section_names:
+                current_section = section_names[section_name]
+            else:
+                for normalized_name, available_section in section_names.items():
+                    if normalized_name in section_name:
+                        current_section = available_section
+                        break
             
             current_content = {
                 'clinical_reasoning': {'summary': '', 'detailed': ''},
@@ -306,367 +347,270 @@ def parse_explanation_text(text: str, available_sections: list) -> Dict:
             current_text = []
             
         # Check if this is an explanation type header
-        elif line.endswith(':') and any(key_phrase in line.lower() for key_phrase in [
-            'clinical reasoning summary',
-            'clinical reasoning detailed', 
-            'evidence-based support summary',
-            'evidence-based support detailed',
-            'student guidance summary',
-            'student guidance detailed'
-        ]):
+        elif line.endswith(':') and (type_match := _EXPLANATION_TYPE_PATTERN.search(line)):
             # Save previous type content
             if current_type and current_text and current_section:
-                content = ' '.join(current_text).strip()
-                if content:
-                    if 'clinical reasoning summary' in current_type:
-                        current_content['clinical_reasoning']['summary'] = content
-                    elif 'clinical reasoning detailed' in current_type:
-                        current_content['clinical_reasoning']['detailed'] = content
-                    elif 'evidence-based support summary' in current_type:
-                        current_content['evidence_based_support']['summary'] = content
-                    elif 'evidence-based support detailed' in current_type:
-                        current_content['evidence_based_support']['detailed'] = content
-                    elif 'student guidance summary' in current_type:
-                        current_content['student_guidance']['summary'] = content
-                    elif 'student guidance detailed' in current_type:
-                        current_content['student_guidance']['detailed'] = content
+                _save_explanation_type(current_content, current_type, ' '.join(current_text))
             
             # Start new type
-            current_type = line.lower()
+            category, field = type_match.group(1, 2)
+            current_type = (_EXPLANATION_CATEGORIES[category.lower()], field.lower())
             current_text = []
             
         # Regular content line
-        elif line and current_section and current_type:
+        elif current_section and current_type:
             current_text.append(line)
     
     # Don't forget the last section
     if current_section and current_content:
         # Save the last type content
         if current_type and current_text:
-            content = ' '.join(current_text).strip()
-            if content:
-                if 'clinical reasoning summary' in current_type:
-                    current_content['clinical_reasoning']['summary'] = content
-                elif 'clinical reasoning detailed' in current_type:
-                    current_content['clinical_reasoning']['detailed'] = content
-                elif 'evidence-based support summary' in current_type:
-                    current_content['evidence_based_support']['summary'] = content
-                elif 'evidence-based support detailed' in current_type:
-                    current_content['evidence_based_support']['detailed'] = content
-                elif 'student guidance summary' in current_type:
-                    current_content['student_guidance']['summary'] = content
-                elif 'student guidance detailed' in current_type:
-                    current_content['student_guidance']['detailed'] = content
+            _save_explanation_type(current_content, current_type, ' '.join(current_text))
         
         explanations[current_section] = current_content
     
     # Ensure all available sections have explanations (with fallbacks if needed)
     for section in available_sections:
         if section not in explanations:
+            # Copy the shared fallback so callers get their own mutable dicts
             explanations[section] = {
-                'clinical_reasoning': {
-                    'summary': f'Clinical reasoning for this {section.replace("_", " ")} component involves systematic analysis of patient data and evidence-based decision making.',
-                    'detailed': f'The {section.replace("_", " ")} component requires comprehensive clinical thinking, incorporating patient assessment data, nursing knowledge, and evidence-based guidelines to ensure safe and effective care delivery.'
-                },
-                'evidence_based_support': {
-                    'summary': f'Evidence-based nursing practice supports comprehensive {section.replace("_", " ")} documentation according to current standards.',
-                    'detailed': f'Current nursing literature and professional guidelines emphasize the importance of thorough {section.replace("_", " ")} documentation for quality patient outcomes and professional accountability.'
-                },
-                'student_guidance': {
-                    'summary': f'Students should understand the purpose and components of effective {section.replace("_", " ")}.',
-                    'detailed': f'Learning objectives include theoretical foundation, practical application, and competency demonstration in {section.replace("_", " ")}. Students should engage in guided practice and reflective learning.'
-                }
+                category: dict(fields) for category, fields in _fallback_explanation(section).items()
             }
     
     return explanations
 
+def _list_items(values) -> Iterable[str]:
+    """Spread a list of selected options into separate entries."""
+    return map(str, values)
+
+def _non_default_language(language) -> List[str]:
+    """English is the default language and is left out."""
+    return [] if language.lower() == 'english' else [f"Language: {language}"]
+
+def _cephalocaudal_findings(cephalocaudal) -> List[str]:
+    """Format head-to-toe findings as "Body System: findings" entries."""
+    if not isinstance(cephalocaudal, dict):
+        return []
+    return [
+        f"{system.replace('_', ' ').title()}: {findings}"
+        for system, findings in cephalocaudal.items()
+        if findings and isinstance(findings, str) and findings.strip()
+    ]
+
+def _associated_symptoms(symptoms) -> List[str]:
+    """Selected symptoms are listed in a single comma-separated entry."""
+    return [f"Associated symptoms: {', '.join(symptoms) if isinstance(symptoms, list) else symptoms}"]
+
+def _named_values(values) -> List[str]:
+    """Format free-form "name: value" pairs such as additional vital signs."""
+    return [f"{name}: {value}" for name, value in values.items() if value]
+
+# Keys that only appear in the comprehensive manual form's flat structure
+_FLAT_FORM_MARKERS = frozenset(('age', 'sex', 'general_condition', 'onset_duration', 'heart_rate_bpm'))
+
+# Joins subjective/objective entries into a bulleted list
+_BULLET_SEPARATOR = '\n• '
+
+# Section specs for format_structured_data. Each section is
+# (title, nested key holding its fields or None for top level, separator, fields)
+# and each field is (key, label template or function returning entries).
+# Fields that are empty are skipped and sections without any entries are left
+# out. The specs are compiled once below (see _compile_sections).
+_DEMOGRAPHIC_FIELDS = (
+    ('age', 'Age: {}'),
+    ('sex', 'Sex: {}'),
+    ('occupation', 'Occupation: {}'),
+    ('religion', 'Religion: {}'),
+    ('cultural_background', 'Cultural Background: {}'),
+    ('language', _non_default_language)
+)
+
+_COMPREHENSIVE_FORM_SECTIONS = (
+    ("Patient Demographics", None, '; ', _DEMOGRAPHIC_FIELDS),
+    ("Chief Complaint", None, '; ', (('general_condition', '{}'),)),
+    ("History of Present Illness", None, '; ', (
+        ('onset_duration', 'Onset/Duration: {}'),
+        ('severity_progression', 'Severity/Progression: {}'),
+        ('medical_impression', 'Medical Impression: {}'),
+        ('associated_symptoms', _associated_symptoms),
+        ('other_symptoms', 'Other symptoms: {}')
+    )),
+    ("Risk Factors", None, ', ', (('risk_factors', _list_items), ('other_risk_factors', '{}'))),
+    ("Past Medical History", None, ', ', (('medical_history', _list_items), ('other_medical_history', '{}'))),
+    ("Family History", None, ', ', (('family_history', _list_items), ('other_family_history', '{}'))),
+    ("Vital Signs", None, '; ', (
+        ('heart_rate_bpm', 'Heart Rate: {} bpm'),
+        ('blood_pressure_mmhg', 'Blood Pressure: {} mmHg'),
+        ('respiratory_rate_min', 'Respiratory Rate: {}/min'),
+        ('oxygen_saturation_percent', 'SpO2: {}%'),
+        ('temperature_celsius', 'Temperature: {}°C'),
+        ('pain_scale', 'Pain Scale: {}/10')
+    )),
+    ("Physical Examination", None, '; ', (
+        ('height', 'Height: {}'),
+        ('weight', 'Weight: {}'),
+        ('cephalocaudal_assessment', _cephalocaudal_findings)
+    )),
+    ("Laboratory Results", None, '; ', (('laboratory_results', '{}'),))
+)
+
+_LEGACY_FORM_SECTIONS = (
+    ("Demographics", 'demographics', '; ', _DEMOGRAPHIC_FIELDS),
+    ("Chief Complaint", None, '; ', (('chief_complaint', '{}'),)),
+    ("History of Present Illness", 'history', '; ', (
+        ('onset_duration', 'Onset/Duration: {}'),
+        ('severity', 'Severity: {}'),
+        ('associated_symptoms', _associated_symptoms),
+        ('other_symptoms', 'Other symptoms: {}')
+    )),
+    ("Past Medical History", None, ', ', (('medical_history', _list_items), ('medical_history_other', '{}'))),
+    ("Vital Signs", 'vital_signs', '; ', (
+        ('HR', 'HR: {} bpm'),
+        ('BP', 'BP: {} mmHg'),
+        ('RR', 'RR: {}/min'),
+        ('SpO2', 'SpO2: {}%'),
+        ('Temp', 'Temp: {}°C'),
+        ('additional_vitals', _named_values)
+    )),
+    ("Physical Examination", None, '; ', (('physical_exam', _list_items), ('physical_exam_other', '{}'))),
+    ("Risk Factors", None, ', ', (('risk_factors', _list_items), ('risk_factors_other', '{}'))),
+    ("Cultural Considerations", 'cultural_considerations', '; ', (
+        ('dietary_restrictions', 'Dietary restrictions: {}'),
+        ('religious_practices', 'Religious practices: {}'),
+        ('communication_preferences', 'Communication preferences: {}'),
+        ('family_involvement', 'Family involvement: {}'),
+        ('health_beliefs', 'Health beliefs: {}'),
+        ('other_considerations', '{}')
+    )),
+    ("Nurse Notes", None, '; ', (('nurse_notes', '{}'),))
+)
+
+def _compile_sections(section_specs) -> tuple:
+    """Prepare section specs for _format_sections.
+    
+    Titles become their full "Title:\n- " lead-in and each label template is
+    split into the text before and after its "{}", so a plain field costs one
+    lookup and one f-string; entry functions are kept as the fourth item.
+    """
+    return tuple(
+        (f"{title}:\n- ", source_key, separator, tuple(
+            (key, None, None, template) if callable(template) else (key, *template.split('{}'), None)
+            for key, template in fields
+        ))
+        for title, source_key, separator, fields in section_specs
+    )
+
+_COMPREHENSIVE_FORM_SECTIONS = _compile_sections(_COMPREHENSIVE_FORM_SECTIONS)
+_LEGACY_FORM_SECTIONS = _compile_sections(_LEGACY_FORM_SECTIONS)
+
+def _format_sections(parts: List[str], data: Dict, compiled_sections: tuple) -> None:
+    """Write the "Title:\n- entry; entry" sections to parts, a blank line after the previous one."""
+    for lead_in, source_key, separator, fields in compiled_sections:
+        source = data if source_key is None else data.get(source_key) or {}
+        entries = []
+        for key, prefix, suffix, entry_function in fields:
+            if value := source.get(key):
+                if entry_function is None:
+                    entries.append(f"{prefix}{value}{suffix}")
+                else:
+                    entries += entry_function(value)
+        if entries:
+            if parts:
+                parts.append('\n\n')
+            parts += (lead_in, separator.join(entries))
+
 def format_structured_data(structured_data) -> str:
     """Format structured assessment data into a string for AI processing."""
-    formatted_sections = []
+    # Sections are written as pieces into one list and joined once at the end
+    parts = []
     
     # Check if this is the new comprehensive manual form format (flat structure)
-    if any(key in structured_data for key in ['age', 'sex', 'general_condition', 'onset_duration', 'heart_rate_bpm']):
-        # Format comprehensive manual form data
-        
-        # Demographics
-        demo_info = []
-        if structured_data.get('age'): demo_info.append(f"Age: {structured_data['age']}")
-        if structured_data.get('sex'): demo_info.append(f"Sex: {structured_data['sex']}")
-        if structured_data.get('occupation'): demo_info.append(f"Occupation: {structured_data['occupation']}")
-        if structured_data.get('religion'): demo_info.append(f"Religion: {structured_data['religion']}")
-        if structured_data.get('cultural_background'): demo_info.append(f"Cultural Background: {structured_data['cultural_background']}")
-        if structured_data.get('language') and structured_data['language'].lower() != 'english': 
-            demo_info.append(f"Language: {structured_data['language']}")
-        if demo_info:
-            formatted_sections.append(f"Patient Demographics:\n- {'; '.join(demo_info)}")
-        
-        # Chief Complaint
-        if structured_data.get('general_condition'):
-            formatted_sections.append(f"Chief Complaint:\n- {structured_data['general_condition']}")
-        
-        # History of Present Illness
-        history_info = []
-        if structured_data.get('onset_duration'): history_info.append(f"Onset/Duration: {structured_data['onset_duration']}")
-        if structured_data.get('severity_progression'): history_info.append(f"Severity/Progression: {structured_data['severity_progression']}")
-        if structured_data.get('medical_impression'): history_info.append(f"Medical Impression: {structured_data['medical_impression']}")
-        if structured_data.get('associated_symptoms'): 
-            history_info.append(f"Associated symptoms: {', '.join(structured_data['associated_symptoms'])}")
-        if structured_data.get('other_symptoms'): history_info.append(f"Other symptoms: {structured_data['other_symptoms']}")
-        if history_info:
-            formatted_sections.append(f"History of Present Illness:\n- {'; '.join(history_info)}")
-        
-        # Risk Factors
-        risk_factors = []
-        if structured_data.get('risk_factors'): risk_factors.extend(structured_data['risk_factors'])
-        if structured_data.get('other_risk_factors'): risk_factors.append(structured_data['other_risk_factors'])
-        if risk_factors:
-            formatted_sections.append(f"Risk Factors:\n- {', '.join(risk_factors)}")
-        
-        # Past Medical History
-        med_history = []
-        if structured_data.get('medical_history'): med_history.extend(structured_data['medical_history'])
-        if structured_data.get('other_medical_history'): med_history.append(structured_data['other_medical_history'])
-        if med_history:
-            formatted_sections.append(f"Past Medical History:\n- {', '.join(med_history)}")
-        
-        # Family History
-        family_history = []
-        if structured_data.get('family_history'): family_history.extend(structured_data['family_history'])
-        if structured_data.get('other_family_history'): family_history.append(structured_data['other_family_history'])
-        if family_history:
-            formatted_sections.append(f"Family History:\n- {', '.join(family_history)}")
-        
-        # Vital Signs
-        vital_info = []
-        if structured_data.get('heart_rate_bpm'): vital_info.append(f"Heart Rate: {structured_data['heart_rate_bpm']} bpm")
-        if structured_data.get('blood_pressure_mmhg'): vital_info.append(f"Blood Pressure: {structured_data['blood_pressure_mmhg']} mmHg")
-        if structured_data.get('respiratory_rate_min'): vital_info.append(f"Respiratory Rate: {structured_data['respiratory_rate_min']}/min")
-        if structured_data.get('oxygen_saturation_percent'): vital_info.append(f"SpO2: {structured_data['oxygen_saturation_percent']}%")
-        if structured_data.get('temperature_celsius'): vital_info.append(f"Temperature: {structured_data['temperature_celsius']}°C")
-        if structured_data.get('pain_scale'): vital_info.append(f"Pain Scale: {structured_data['pain_scale']}/10")
-        if vital_info:
-            formatted_sections.append(f"Vital Signs:\n- {'; '.join(vital_info)}")
-        
-        # Physical Examination
-        physical_exam = []
-        if structured_data.get('height'): physical_exam.append(f"Height: {structured_data['height']}")
-        if structured_data.get('weight'): physical_exam.append(f"Weight: {structured_data['weight']}")
-        
-        # Cephalocaudal Assessment
-        cephalocaudal = structured_data.get('cephalocaudal_assessment', {})
-        if isinstance(cephalocaudal, dict) and any(cephalocaudal.values()):
-            cc_findings = []
-            for system, findings in cephalocaudal.items():
-                if findings and isinstance(findings, str) and findings.strip():
-                    cc_findings.append(f"{system.replace('_', ' ').title()}: {findings}")
-            if cc_findings:
-                physical_exam.extend(cc_findings)
-        
-        if physical_exam:
-            formatted_sections.append(f"Physical Examination:\n- {'; '.join(physical_exam)}")
-        
-        # Laboratory Findings
-        if structured_data.get('laboratory_results'):
-            formatted_sections.append(f"Laboratory Results:\n- {structured_data['laboratory_results']}")
-        
-        # Subjective and Objective Data (if present)
-        subjective_data = structured_data.get('subjective', [])
-        if subjective_data and isinstance(subjective_data, list) and subjective_data:
-            formatted_sections.append(f"Subjective Data:\n- {chr(10).join([f'• {item}' for item in subjective_data if item.strip()])}")
-        
-        objective_data = structured_data.get('objective', [])
-        if objective_data and isinstance(objective_data, list) and objective_data:
-            formatted_sections.append(f"Objective Data:\n- {chr(10).join([f'• {item}' for item in objective_data if item.strip()])}")
-        
-        return '\n\n'.join(formatted_sections)
-    
-    # Legacy structured format handling
+    if not _FLAT_FORM_MARKERS.isdisjoint(structured_data):
+        _format_sections(parts, structured_data, _COMPREHENSIVE_FORM_SECTIONS)
+        
+        # Subjective and Objective Data (if present), one bullet per non-blank entry
+        for key, title in (('subjective', "Subjective Data"), ('objective', "Objective Data")):
+            data_items = structured_data.get(key)
+            if not isinstance(data_items, list):
+                continue
+            items = [item for item in data_items if isinstance(item, str) and item.strip()]
+            if items:
+                if parts:
+                    parts.append('\n\n')
+                parts += (title, ':\n• ', _BULLET_SEPARATOR.join(items))
     else:
-        # Demographics
-        demographics = structured_data.get('demographics', {})
-        if any(demographics.values()):
-            demo_info = []
-            if demographics.get('age'): demo_info.append(f"Age: {demographics['age']}")
-            if demographics.get('sex'): demo_info.append(f"Sex: {demographics['sex']}")
-            if demographics.get('occupation'): demo_info.append(f"Occupation: {demographics['occupation']}")
-            if demographics.get('religion'): demo_info.append(f"Religion: {demographics['religion']}")
-            if demographics.get('cultural_background'): demo_info.append(f"Cultural Background: {demographics['cultural_background']}")
-            if demographics.get('language') and demographics['language'].lower() != 'english': 
-                demo_info.append(f"Language: {demographics['language']}")
-            if demo_info:
-                formatted_sections.append(f"Demographics:\n- {'; '.join(demo_info)}")
-        
-        # Chief Complaint
-        if structured_data.get('chief_complaint'):
-            formatted_sections.append(f"Chief Complaint:\n- {structured_data['chief_complaint']}")
-        
-        # History
-        history = structured_data.get('history', {})
-        if any(history.values()):
-            history_info = []
-            if history.get('onset_duration'): history_info.append(f"Onset/Duration: {history['onset_duration']}")
-            if history.get('severity'): history_info.append(f"Severity: {history['severity']}")
-            if history.get('associated_symptoms'): 
-                history_info.append(f"Associated symptoms: {', '.join(history['associated_symptoms'])}")
-            if history.get('other_symptoms'): history_info.append(f"Other symptoms: {history['other_symptoms']}")
-            if history_info:
-                formatted_sections.append(f"History of Present Illness:\n- {'; '.join(history_info)}")
-        
-        # Medical History
-        med_history = structured_data.get('medical_history', [])
-        med_history_other = structured_data.get('medical_history_other', '')
-        if med_history or med_history_other:
-            history_items = med_history.copy()
-            if med_history_other: history_items.append(med_history_other)
-            formatted_sections.append(f"Past Medical History:\n- {', '.join(history_items)}")
-        
-        # Vital Signs
-        vitals = structured_data.get('vital_signs', {})
-        if any(v for v in vitals.values() if v is not None and v != ''):
-            vital_info = []
-            if vitals.get('HR'): vital_info.append(f"HR: {vitals['HR']} bpm")
-            if vitals.get('BP'): vital_info.append(f"BP: {vitals['BP']} mmHg")
-            if vitals.get('RR'): vital_info.append(f"RR: {vitals['RR']}/min")
-            if vitals.get('SpO2'): vital_info.append(f"SpO2: {vitals['SpO2']}%")
-            if vitals.get('Temp'): vital_info.append(f"Temp: {vitals['Temp']}°C")
-        
-        # Add additional vitals
-        additional_vitals = vitals.get('additional_vitals', {})
-        for vital_name, vital_value in additional_vitals.items():
-            if vital_value:
-                vital_info.append(f"{vital_name}: {vital_value}")
-        
-        if vital_info:
-            formatted_sections.append(f"Vital Signs:\n- {'; '.join(vital_info)}")
-    
-    # Physical Exam
-    phys_exam = structured_data.get('physical_exam', [])
-    phys_exam_other = structured_data.get('physical_exam_other', '')
-    if phys_exam or phys_exam_other:
-        exam_items = phys_exam.copy()
-        if phys_exam_other: exam_items.append(phys_exam_other)
-        formatted_sections.append(f"Physical Examination:\n- {'; '.join(str(item) for item in exam_items)}")
-    
-    # Risk Factors
-    risk_factors = structured_data.get('risk_factors', [])
-    risk_factors_other = structured_data.get('risk_factors_other', '')
-    if risk_factors or risk_factors_other:
-        risk_items = risk_factors.copy()
-        if risk_factors_other: risk_items.append(risk_factors_other)
-        formatted_sections.append(f"Risk Factors:\n- {', '.join(risk_items)}")
-    
-    # Cultural Considerations
-    cultural = structured_data.get('cultural_considerations', {})
-    if any(cultural.values()):
-        cultural_info = []
-        if cultural.get('dietary_restrictions'): 
-            cultural_info.append(f"Dietary restrictions: {cultural['dietary_restrictions']}")
-        if cultural.get('religious_practices'): 
-            cultural_info.append(f"Religious practices: {cultural['religious_practices']}")
-        if cultural.get('communication_preferences'): 
-            cultural_info.append(f"Communication preferences: {cultural['communication_preferences']}")
-        if cultural.get('family_involvement'): 
-            cultural_info.append(f"Family involvement: {cultural['family_involvement']}")
-        if cultural.get('health_beliefs'): 
-            cultural_info.append(f"Health beliefs: {cultural['health_beliefs']}")
-        if cultural.get('other_considerations'): 
-            cultural_info.append(cultural['other_considerations'])
-        if cultural_info:
-            formatted_sections.append(f"Cultural Considerations:\n- {'; '.join(cultural_info)}")
-    
-    # Nurse Notes
-    if structured_data.get('nurse_notes'):
-        formatted_sections.append(f"Nurse Notes:\n- {structured_data['nurse_notes']}")
-    
-    return '\n\n'.join(formatted_sections)
-
-def format_assessment_for_selection(assessment_data: Dict) -> str:
-    """Format assessment data specifically for diagnosis selection."""
-    # Check if this is the new comprehensive manual form format
-    if any(key in assessment_data for key in ['age', 'sex', 'general_condition', 'onset_duration', 'heart_rate_bpm']):
-        # Use the comprehensive formatter with selection header
-        formatted_data = format_structured_data(assessment_data)
-        return f"**PATIENT ASSESSMENT DATA:**\n\n{formatted_data}"
+        # Legacy structured format handling
+        _format_sections(parts, structured_data, _LEGACY_FORM_SECTIONS)
     
-    # Check if this is legacy manual mode format (subjective/objective lists only)
-    elif 'subjective' in assessment_data and 'objective' in assessment_data and len(assessment_data) <= 3:
-        subjective_items = assessment_data.get('subjective', [])
-        objective_items = assessment_data.get('objective', [])
-        
-        formatted = "**PATIENT ASSESSMENT DATA:**\n\n"
-        
-        if subjective_items:
-            formatted += "**Subjective Data:**\n"
-            for item in subjective_items:
-                formatted += f"- {item}\n"
-            formatted += "\n"
-        
-        if objective_items:
-            formatted += "**Objective Data:**\n"
-            for item in objective_items:
-                formatted += f"- {item}\n"
-            formatted += "\n"
-        
-        return formatted
-    else:
-        # This is assistant mode format - use the existing formatter
-        return format_structured_data(assessment_data)
+    return ''.join(parts)
+
+# Fixed headings of the assessment text sent with AI prompts
+_ASSESSMENT_HEADER = "**PATIENT ASSESSMENT DATA:**\n\n"
+_SUBJECTIVE_HEADER = "**Subjective Data:**\n"
+_OBJECTIVE_HEADER = "**Objective Data:**\n"
 
-def format_assessment_for_ncp(assessment_data: Dict) -> str:
-    """Format assessment data specifically for NCP generation."""
+# Keys of the legacy manual mode payload, which may carry one other key besides them
+_MANUAL_MODE_KEYS = frozenset(('subjective', 'objective'))
+
+def _format_assessment(assessment_data: Dict) -> str:
+    """Format assessment data for the diagnosis selection and NCP generation prompts."""
     # Check if this is the new comprehensive manual form format
-    if any(key in assessment_data for key in ['age', 'sex', 'general_condition', 'onset_duration', 'heart_rate_bpm']):
-        # Use the comprehensive formatter with NCP header
-        formatted_data = format_structured_data(assessment_data)
-        return f"**PATIENT ASSESSMENT DATA:**\n\n{formatted_data}"
+    if not _FLAT_FORM_MARKERS.isdisjoint(assessment_data):
+        # Use the comprehensive formatter with the assessment header
+        return _ASSESSMENT_HEADER + format_structured_data(assessment_data)
     
     # Check if this is legacy manual mode format (subjective/objective lists only)
-    elif 'subjective' in assessment_data and 'objective' in assessment_data and len(assessment_data) <= 3:
+    elif assessment_data.keys() >= _MANUAL_MODE_KEYS and len(assessment_data) <= 3:
         subjective_items = assessment_data.get('subjective', [])
         objective_items = assessment_data.get('objective', [])
         
-        formatted = "**PATIENT ASSESSMENT DATA:**\n\n"
+        parts = [_ASSESSMENT_HEADER]
         
         if subjective_items:
-            formatted += "**Subjective Data:**\n"
-            for item in subjective_items:
-                formatted += f"- {item}\n"
-            formatted += "\n"
+            parts.append(_SUBJECTIVE_HEADER)
+            parts.extend(f"- {item}\n" for item in subjective_items)
+            parts.append("\n")
         
         if objective_items:
-            formatted += "**Objective Data:**\n"
-            for item in objective_items:
-                formatted += f"- {item}\n"
-            formatted += "\n"
+            parts.append(_OBJECTIVE_HEADER)
+            parts.extend(f"- {item}\n" for item in objective_items)
+            parts.append("\n")
         
-        return formatted
+        return "".join(parts)
     else:
         # This is assistant mode format - use the existing formatter
         return format_structured_data(assessment_data)
 
+# Diagnosis selection and NCP generation present the assessment the same way
+format_assessment_for_selection = _format_assessment
+format_assessment_for_ncp = _format_assessment
+
 def safe_format_list(items, fallback="Not specified in database"):
     """Helper function to safely join arrays or provide fallback."""
-    if not items or (isinstance(items, list) and len(items) == 0):
+    if not items:
         return fallback
     if isinstance(items, list):
-        return ', '.join(str(item) for item in items if item)
-    return str(items) if items else fallback
+        # Most entries are already strings, so str() is only called for the rest
+        return ', '.join(item if type(item) is str else str(item) for item in items if item) or fallback
+    return str(items)
 
 def validate_ncp_structure(ncp_data: Dict) -> bool:
     """Validate that the NCP has the required structure and content."""
-    required_sections = ["assessment", "diagnosis", "outcomes", "interventions", "rationale", "implementation", "evaluation"]
-    
     # Check all sections exist
-    if not all(section in ncp_data for section in required_sections):
+    if not ncp_data.keys() >= _NCP_SECTION_KEY_SET:
         return False
     
     # Check each section has meaningful content
-    for section, content in ncp_data.items():
-        if section in required_sections:
-            if not content or (isinstance(content, str) and len(content.strip()) < 10):
-                return False
-            if isinstance(content, dict) and not any(v for v in content.values() if v):
-                return False
+    for section in _NCP_SECTION_KEYS:
+        content = ncp_data[section]  # presence checked above
+        if not content:
+            return False
+        # Sections are plain str or dict values built by the NCP parser
+        content_type = type(content)
+        if content_type is str and len(content.strip()) < 10:
+            return False
+        if content_type is dict and not any(content.values()):
+            return False
     
     # Validate outcomes structure (allow flexibility for short_term or long_term only)
     outcomes = ncp_data.get("outcomes", {})
@@ -674,8 +618,8 @@ def validate_ncp_structure(ncp_data: Dict) -> bool:
         return False
     
     # At least one type of outcome should exist
-    has_short_term = outcomes.get("short_term") and len(outcomes["short_term"]) > 0
-    has_long_term = outcomes.get("long_term") and len(outcomes["long_term"]) > 0
+    has_short_term = bool(outcomes.get("short_term"))
+    has_long_term = bool(outcomes.get("long_term"))
     
     if not (has_short_term or has_long_term):
         return False
@@ -686,9 +630,9 @@ def validate_ncp_structure(ncp_data: Dict) -> bool:
         return False
     
     # At least one intervention category should have content
-    has_independent = interventions.get("independent") and len(interventions["independent"]) > 0
-    has_dependent = interventions.get("dependent") and len(interventions["dependent"]) > 0
-    has_collaborative = interventions.get("collaborative") and len(interventions["collaborative"]) > 0
+    has_independent = bool(interventions.get("independent"))
+    has_dependent = bool(interventions.get("dependent"))
+    has_collaborative = bool(interventions.get("collaborative"))
     
     if not (has_independent or has_dependent or has_collaborative):
         return False
@@ -700,7 +644,14 @@ def validate_ncp_structure(ncp_data: Dict) -> bool:
     
     return True
 
-def validate_ai_selection(ai_response: Dict, candidates: List[Dict]) -> bool:
+def index_candidates(candidates: List[Dict]) -> Dict[str, Dict]:
+    """Index candidates by normalized (stripped, lowercase) diagnosis name; the first candidate wins."""
+    candidate_index = {}
+    for candidate in candidates:
+        candidate_index.setdefault(candidate['diagnosis'].strip().lower(), candidate)
+    return candidate_index
+
+def validate_ai_selection(ai_response: Dict, candidate_index: Dict[str, Dict]) -> bool:
     """Validate that AI selected a diagnosis from the candidate list."""
     selected_diagnosis = ai_response.get('diagnosis', '').strip()
     
@@ -708,19 +659,16 @@ def validate_ai_selection(ai_response: Dict, candidates: List[Dict]) -> bool:
         return False
     
     # Check if the selected diagnosis matches any candidate (case-insensitive)
-    candidate_diagnoses = [candidate['diagnosis'].strip().lower() for candidate in candidates]
-    return selected_diagnosis.lower() in candidate_diagnoses
+    return selected_diagnosis.lower() in candidate_index
 
-def find_matching_candidate(ai_response: Dict, candidates: List[Dict]) -> Dict:
+def find_matching_candidate(ai_response: Dict, candidate_index: Dict[str, Dict]) -> Dict:
     """Find the matching candidate and return its complete data."""
     selected_diagnosis = ai_response.get('diagnosis', '').strip().lower()
     
-    for candidate in candidates:
-        if candidate['diagnosis'].strip().lower() == selected_diagnosis:
-            # Return the candidate data with AI reasoning
-            return {
-                **candidate,  # All original candidate data
-                "reasoning": ai_response.get('reasoning', 'No reasoning provided')
-            }
+    if (candidate := candidate_index.get(selected_diagnosis)) is not None:
+        # Return a copy of all original candidate data with AI reasoning
+        matched_candidate = candidate.copy()
+        matched_candidate["reasoning"] = ai_response.get('reasoning', 'No reasoning provided')
+        return matched_candidate
     
-    return None
\ No newline at end of file
+    return None
@@ -3,6 +3,8 @@ Admin Panel Setup Verification Script
 Checks if all required configurations are in place
 """
 import os
+import threading
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -24,6 +26,35 @@ def check_env_var(name, required=True):
             print(f"⚠️  {name} is NOT set (optional)")
         return False
 
+# Seconds the connection probe may wait on Supabase before it is reported as failed
+SUPABASE_PROBE_TIMEOUT = 5
+
+@lru_cache(maxsize=1)
+def _get_supabase(url, key):
+    """Create the Supabase client once and reuse it for repeated checks"""
+    from supabase import ClientOptions, create_client
+    # Bound database requests so an unreachable project can't hang the check
+    return create_client(url, key, options=ClientOptions(postgrest_client_timeout=SUPABASE_PROBE_TIMEOUT))
+
+def _probe_supabase():
+    """Try a simple Supabase query; returns (success, lines to report)"""
+    try:
+        supabase_url = os.getenv("SUPABASE_URL")
+        supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+        
+        if not (supabase_url and supabase_key):
+            return False, ["❌ Cannot test connection - credentials missing"]
+        
+        supabase = _get_supabase(supabase_url, supabase_key)
+        
+        # Try a simple query
+        supabase.table("ncps").select("id").limit(1).execute()
+        return True, ["✅ Supabase connection successful", "   Database is accessible"]
+    except ImportError:
+        return False, ["⚠️  Supabase library not installed", "   Run: pip install -r requirements.txt"]
+    except Exception as e:
+        return False, [f"❌ Supabase connection failed: {str(e)}"]
+
 def verify_setup():
     """Verify admin panel setup"""
     print("=" * 60)
@@ -33,6 +64,13 @@ def verify_setup():
     
     all_good = True
     
+    # Start the Supabase connection test right away so its network round trip
+    # overlaps with the local checks below. It runs in a daemon thread so a
+    # probe that outlives the wait further down can't keep the script alive
+    supabase_result = []
+    supabase_probe = threading.Thread(target=lambda: supabase_result.append(_probe_supabase()), daemon=True)
+    supabase_probe.start()
+    
     # Check required environment variables
     print("Checking Environment Variables...")
     print("-" * 60)
@@ -68,9 +106,12 @@ def verify_setup():
         (".env", "Environment configuration"),
     ]
     
+    # List the backend directory once instead of stat-ing each file
+    with os.scandir(BACKEND_DIR) as entries:
+        existing_files = {entry.name for entry in entries}
+    
     for filename, description in files_to_check:
-        filepath = BACKEND_DIR / filename
-        if filepath.exists():
+        if filename in existing_files:
             print(f"✅ {description} ({filename})")
         else:
             print(f"❌ {description} ({filename}) NOT FOUND")
@@ -82,29 +123,15 @@ def verify_setup():
     print("Testing Supabase Connection...")
     print("-" * 60)
     
-    try:
-        from supabase import create_client
-        
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-        
-        if supabase_url and supabase_key:
-            supabase = create_client(supabase_url, supabase_key)
-            
-            # Try a simple query
-            result = supabase.table("ncps").select("id").limit(1).execute()
-            print("✅ Supabase connection successful")
-            print(f"   Database is accessible")
-        else:
-            print("❌ Cannot test connection - credentials missing")
-            all_good = False
-            
-    except ImportError:
-        print("⚠️  Supabase library not installed")
-        print("   Run: pip install -r requirements.txt")
-        all_good = False
-    except Exception as e:
-        print(f"❌ Supabase connection failed: {str(e)}")
+    supabase_probe.join(timeout=SUPABASE_PROBE_TIMEOUT * 2)
+    if supabase_result:
+        supabase_ok, report = supabase_result[0]
+    else:
+        supabase_ok, report = False, ["❌ Supabase connection failed: timed out"]
+    
+    for line in report:
+        print(line)
+    if not supabase_ok:
         all_good = False
     
     print()